@@ -4,11 +4,16 @@
 #
 # 提供関数（主要）:
 # - init_db() -> None
+# - warm_read_pool() -> None
+# - acquire_writer_lock() -> None
+# - fits_sqlite_int(value: int) -> bool
 # - person_exists(person_id: int) -> bool
 # - update_status(person_id: int, status: int, timestamp: str) -> Optional[int]
+# - bulk_update_status(pairs: List[Tuple[int, int]], timestamp: str) -> List[Tuple[int, Optional[int], int]]
 # - get_status_table() -> List[dict]
 # - get_people_all() -> List[dict]
 # - insert_person(default_data: dict) -> int
+# - insert_people_bulk(people: List[dict], initial_status: int, timestamp: str) -> List[int]
 # - delete_person(person_id: int) -> None
 # - apply_bulk_updates(records: List[dict]) -> dict
 #
@@ -17,41 +22,236 @@
 # - SQL は必ずパラメタ化して実行（SQLインジェクション対策）
 # - トランザクション（BEGIN/COMMIT/ROLLBACK）を用いて一括更新の一貫性を確保
 # - 外部キーを有効化（必要に応じて）して整合性を保つ
+# - WAL モード + busy_timeout で読み取りと書き込みの同時実行に備える
+# - 接続は使い回す（読み取りはプール、書き込みは単一接続をロックで直列化）
 # - DB ファイルはデフォルトで /app/database.db（Docker の WORKDIR /app を想定）
 #
 # 注意:
 # - 実運用で大量の同時書き込みがある場合、SQLite から PostgreSQL 等に移行を検討してください。
 
+import json
 import sqlite3
-from typing import List, Dict, Optional, Any
+from collections import OrderedDict
+from typing import List, Dict, Optional, Any, Callable, Iterator, Sequence, Tuple, TypeVar
+from contextlib import contextmanager
 import os
 import logging
+import queue
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows 等（acquire_writer_lock は確認を省略する）
+    fcntl = None  # type: ignore[assignment]
 
 # DB ファイルのパス（コンテナ内の /app を想定）
 DB_PATH = os.environ.get("SENSEI_DB_PATH", "database.db")
 
+# 読み取り用にプールしておく接続数の上限
+_READ_POOL_SIZE = 4
+
+# 接続ごとにキャッシュするコンパイル済み SQL 文の数
+_CACHED_STATEMENTS = 256
+
+# よく使う SQL はモジュール定数として一度だけ定義する。
+# 同じ文字列で実行することで sqlite3 の文キャッシュ（cached_statements）が効き、
+# 2 回目以降は SQL の解析を省略できる。
+_SQL_PERSON_EXISTS = "SELECT 1 FROM people WHERE id = ? LIMIT 1"
+_SQL_STATUS_SELECT = "SELECT status FROM status WHERE person_id = ?"
+_SQL_STATUS_INSERT = "INSERT INTO status (person_id, status, timestamp) VALUES (?, ?, ?)"
+_SQL_STATUS_UPDATE = "UPDATE status SET status = ?, timestamp = ? WHERE person_id = ?"
+# id の一覧は JSON 配列 1 つとして渡す（_fetch_in を参照）。
+# 件数によらず SQL 文字列が同じになるため、他の文を文キャッシュから追い出さない
+_SQL_PEOPLE_IDS_IN = "SELECT id FROM people WHERE id IN (SELECT value FROM json_each(?))"
+_SQL_STATUS_SELECT_IN = "SELECT person_id, status FROM status WHERE person_id IN (SELECT value FROM json_each(?))"
+_SQL_STATUS_TABLE = """
+    SELECT p.id as id, p.name as name, p.department as department, p.grade as grade,
+           p.role as role, p.room as room,
+           s.status as status, s.timestamp as timestamp
+    FROM people p
+    LEFT JOIN status s ON p.id = s.person_id
+    ORDER BY COALESCE(p.department, ''), COALESCE(p.room, ''), COALESCE(p.name, '')
+"""
+_SQL_PEOPLE_ALL = """
+    SELECT id, name, department, grade, role, room
+    FROM people
+    ORDER BY COALESCE(department, ''), COALESCE(room, ''), COALESCE(name, '')
+"""
+_SQL_INSERT_PERSON = "INSERT INTO people (name, department, grade, role, room) VALUES (?, ?, ?, ?, ?)"
+_SQL_UPDATE_PERSON = "UPDATE people SET name = ?, department = ?, grade = ?, role = ?, room = ? WHERE id = ?"
+_SQL_DELETE_STATUS = "DELETE FROM status WHERE person_id = ?"
+_SQL_DELETE_PERSON = "DELETE FROM people WHERE id = ?"
+
+# SQLite の INTEGER に格納できる範囲（符号付き 64bit）
+_SQLITE_INT_MIN = -(2 ** 63)
+_SQLITE_INT_MAX = 2 ** 63 - 1
+
+T = TypeVar("T")
+
+# 読み取り用接続プール（必要になった時点で接続を作成し、使用後はここへ返却する）
+_read_pool: "queue.Queue[sqlite3.Connection]" = queue.Queue(maxsize=_READ_POOL_SIZE)
+
+# 書き込み用の単一接続。_write_lock を保持している間だけ使用する
+_write_conn: Optional[sqlite3.Connection] = None
+_write_lock = threading.Lock()
+
+# get_people_all の結果キャッシュ（people 更新時に破棄、それ以外は _PEOPLE_TTL 秒で失効）
+# gen は破棄のたびに進め、破棄前に読んだ古い結果を書き戻さないために使う
+_PEOPLE_TTL = 5
+_people_cache: Dict[str, Any] = {"data": None, "ts": 0.0, "gen": 0}
+_people_cache_lock = threading.Lock()
+
+# person_id ごとの最新ステータス（LRU、最大 _STATUS_CACHE_SIZE 件）
+# 値は (status, DB で確認した時刻)。同じ値の再送（端末の定期送信）では DB に触れずに済ませるために使う。
+# status テーブルへの書き込みはこのプロセスの書き込み接続のみで行う前提（acquire_writer_lock で保証する）。
+# それでも手作業での DB 修正などは検知できないため、_STATUS_CACHE_TTL 秒を過ぎた値は DB で確認し直す。
+_STATUS_CACHE_SIZE = 10000
+_STATUS_CACHE_TTL = 5
+_status_cache: "OrderedDict[int, Tuple[int, float]]" = OrderedDict()
+_status_cache_lock = threading.Lock()
+
+# 書き込みプロセスが 1 つであることを示すロックファイル（プロセス終了まで開いたままにする）
+# gunicorn の再起動（HUP）では新ワーカーが旧ワーカーの終了前に起動するため、解放を最大 _WRITER_LOCK_WAIT 秒待つ
+_WRITER_LOCK_WAIT = 30
+_writer_lock_file: Optional[Any] = None
+
 
 def _get_conn() -> sqlite3.Connection:
     """
-    SQLite 接続を返す。外部キー制約を有効化して返す。
+    SQLite 接続を返す。WAL モード等の PRAGMA と外部キー制約を有効化して返す。
     detect_types はデフォルトでそのまま。
+    プールしてスレッド間で受け渡すため check_same_thread=False で開く。
     """
-    conn = sqlite3.connect(DB_PATH, detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES)
-    conn.row_factory = sqlite3.Row
+    conn = sqlite3.connect(
+        DB_PATH,
+        detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES,
+        check_same_thread=False,
+        cached_statements=_CACHED_STATEMENTS,
+    )
+    # row_factory は設定しない（行はタプルのまま扱い、列名による参照コストを避ける）
+    # WAL: 書き込み中も読み取りをブロックしない（DB ファイルに永続化されるため 2 回目以降は軽い）
+    conn.execute("PRAGMA journal_mode = WAL")
+    # WAL 下では NORMAL でも整合性は保たれる（コミット毎の fsync を省略）
+    conn.execute("PRAGMA synchronous = NORMAL")
+    # ロック競合時は例外にせず最大 30 秒待つ
+    conn.execute("PRAGMA busy_timeout = 30000")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    # ページキャッシュ約 20MB（負値は KiB 指定）
+    conn.execute("PRAGMA cache_size = -20000")
     # 外部キー制約を有効にする（SQLite のデフォルトは無効）
     conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA mmap_size = 268435456")
     return conn
 
 
+@contextmanager
+def _get_read_conn() -> Iterator[sqlite3.Connection]:
+    """
+    読み取り用の接続をプールから借りる。
+    - プールが空なら新しく接続を作成する
+    - 使用後はプールへ返却し、プールが満杯なら close する
+    """
+    try:
+        conn = _read_pool.get_nowait()
+    except queue.Empty:
+        conn = _get_conn()
+    try:
+        yield conn
+    finally:
+        try:
+            _read_pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+
+def _with_write(fn: Callable[[sqlite3.Connection], T]) -> T:
+    """
+    書き込み用の単一接続で fn(conn) を実行する。
+    - _write_lock によりプロセス内の書き込みを直列化する
+    - fn が例外を送出した場合、未確定のトランザクションは rollback する
+    """
+    global _write_conn
+    with _write_lock:
+        if _write_conn is None:
+            _write_conn = _get_conn()
+        conn = _write_conn
+        try:
+            return fn(conn)
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+
+
+def _fetch_in(cur: sqlite3.Cursor, sql: str, values: Sequence[Any]) -> List[Any]:
+    """
+    values を JSON 配列にして sql の json_each(?) に 1 つのパラメータとして渡し、全行を返す。
+    値の数によらず同じ SQL 文字列で実行でき、SQLite の変数上限にも掛からない。
+    values の要素は SQLite の INTEGER に収まる整数であること（呼び出し側で確認済みとする）。
+    """
+    if not values:
+        return []
+    cur.execute(sql, (json.dumps(list(values)),))
+    return cur.fetchall()
+
+
+def _ensure_db_dir() -> None:
+    """
+    DB ファイルを置くディレクトリを作成する（存在していてもエラーにしない）。
+    """
+    os.makedirs(os.path.dirname(DB_PATH) or ".", exist_ok=True)
+
+
+def fits_sqlite_int(value: int) -> bool:
+    """
+    value が SQLite の INTEGER（符号付き 64bit）に収まるかを返す。
+    """
+    return _SQLITE_INT_MIN <= value <= _SQLITE_INT_MAX
+
+
+def _check_sqlite_int(value: int) -> None:
+    """
+    SQLite の INTEGER（符号付き 64bit）に収まらない整数なら OverflowError を送出する。
+    メッセージは sqlite3 がバインド時に送出するものと揃える。
+    """
+    if not fits_sqlite_int(value):
+        raise OverflowError("Python int too large to convert to SQLite INTEGER")
+
+
+def _invalidate_people_cache() -> None:
+    """
+    get_people_all のキャッシュを破棄する（people を変更した後に呼ぶ）。
+    """
+    with _people_cache_lock:
+        _people_cache["data"] = None
+        _people_cache["gen"] += 1
+
+
+def _cache_statuses(statuses: Dict[int, int]) -> None:
+    """
+    最新ステータスのキャッシュを更新する（DB へ書き込んだ後、書き込みロック内で呼ぶ）。
+    DB で確認した値として、確認時刻も合わせて記録する。
+    """
+    now = time.monotonic()
+    with _status_cache_lock:
+        for person_id, status in statuses.items():
+            _status_cache[person_id] = (status, now)
+            _status_cache.move_to_end(person_id)
+        while len(_status_cache) > _STATUS_CACHE_SIZE:
+            _status_cache.popitem(last=False)
+
+
 def init_db() -> None:
     """
     DB ファイルとテーブルを作成する（存在しない場合）。
     - people テーブル
     - status テーブル（person_id を PRIMARY KEY として最新状態のみを保持）
+    - 一覧の並び順用の索引 idx_people_sort
     """
-    os.makedirs(os.path.dirname(DB_PATH) or ".", exist_ok=True)
-    conn = _get_conn()
-    try:
+    _ensure_db_dir()
+
+    def _run(conn: sqlite3.Connection) -> None:
         cur = conn.cursor()
         cur.execute(
             """
@@ -75,23 +275,80 @@ def init_db() -> None:
             )
             """
         )
+        # 一覧の並び順（COALESCE 済みの department, room, name）と同じ式の索引。
+        # 一覧取得時に全件ソートせず索引順に走査できる。
+        cur.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_people_sort
+            ON people (COALESCE(department, ''), COALESCE(room, ''), COALESCE(name, ''))
+            """
+        )
         conn.commit()
-    finally:
-        conn.close()
+
+    _with_write(_run)
+
+
+def warm_read_pool() -> None:
+    """
+    読み取り用接続プールを上限まで事前に作成する（アプリ起動時に 1 回呼ぶ）。
+    接続の作成と PRAGMA 設定を最初のリクエストで行わずに済む。
+    """
+    while not _read_pool.full():
+        conn = _get_conn()
+        try:
+            _read_pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+            return
+
+
+def acquire_writer_lock() -> None:
+    """
+    このプロセスを DB の唯一の書き込みプロセスとして登録する（アプリ起動時に 1 回呼ぶ）。
+    ステータスのキャッシュは他プロセスからの書き込みを想定していないため、
+    同じ DB を使うプロセス（gunicorn の 2 つ目のワーカー、同じ DB をマウントした別コンテナ等）が
+    _WRITER_LOCK_WAIT 秒待っても動き続けている場合は RuntimeError を送出して起動を止める。
+    fcntl が使えない環境では確認せずに警告だけ出す。
+    ロック自体が使えない（flock 非対応のファイルシステム等）場合は、その OSError をそのまま送出する。
+    """
+    global _writer_lock_file
+    if _writer_lock_file is not None:
+        return
+    if fcntl is None:
+        logging.warning("fcntl が使えないため、書き込みプロセスが 1 つであることを確認できません")
+        return
+
+    _ensure_db_dir()
+    f = open(DB_PATH + ".writer.lock", "a")
+    deadline = time.monotonic() + _WRITER_LOCK_WAIT
+    while True:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            break
+        except BlockingIOError as e:
+            # 他プロセスが保持中の場合のみ待つ
+            if time.monotonic() >= deadline:
+                f.close()
+                raise RuntimeError(
+                    f"{DB_PATH} は別のプロセスが使用中です"
+                    "（書き込みプロセスは 1 つに限る。gunicorn は --workers 1 で起動すること）"
+                ) from e
+            time.sleep(0.1)
+        except OSError:
+            f.close()
+            raise
+    _writer_lock_file = f
 
 
 def person_exists(person_id: int) -> bool:
     """
     指定した person_id が people テーブルに存在するかを返す。
     """
-    conn = _get_conn()
-    try:
+    with _get_read_conn() as conn:
         cur = conn.cursor()
-        cur.execute("SELECT 1 FROM people WHERE id = ? LIMIT 1", (person_id,))
+        cur.execute(_SQL_PERSON_EXISTS, (person_id,))
         row = cur.fetchone()
         return row is not None
-    finally:
-        conn.close()
 
 
 def update_status(person_id: int, status: int, timestamp: str) -> Optional[int]:
@@ -107,32 +364,109 @@ def update_status(person_id: int, status: int, timestamp: str) -> Optional[int]:
       - old_status: int  -> 既存レコードの status（存在した場合）
       - None: -> 旧値が存在しない（初回挿入）
     """
-    conn = _get_conn()
-    try:
+    def _run(conn: sqlite3.Connection) -> Optional[int]:
         cur = conn.cursor()
-        cur.execute("SELECT status FROM status WHERE person_id = ?", (person_id,))
+        # 旧値の取得と書き込みを 1 トランザクションにまとめる（書き込みロックは先に確保）
+        cur.execute("BEGIN IMMEDIATE")
+        cur.execute(_SQL_STATUS_SELECT, (person_id,))
         row = cur.fetchone()
-        if row is None:
-            # 初回挿入
-            cur.execute(
-                "INSERT INTO status (person_id, status, timestamp) VALUES (?, ?, ?)",
-                (person_id, status, timestamp),
-            )
-            conn.commit()
-            return None
+        old_status = None if row is None else int(row[0])
+        if old_status == status:
+            # 旧値と同じなら何も書かない（コミット不要）
+            conn.rollback()
+            _cache_statuses({person_id: status})
+            return old_status
+
+        # 旧値の有無は分かっているので、UPSERT（挿入を試みて衝突したら更新）ではなく
+        # 該当する文を直接実行し、B-tree の探索を 1 回で済ませる
+        if old_status is None:
+            cur.execute(_SQL_STATUS_INSERT, (person_id, status, timestamp))
         else:
-            old_status = int(row["status"])
-            # 旧値と異なるときのみ更新（仕様通り）
+            cur.execute(_SQL_STATUS_UPDATE, (status, timestamp, person_id))
+        conn.commit()
+        _cache_statuses({person_id: status})
+        # 旧値（初回挿入なら None）
+        return old_status
+
+    return _with_write(_run)
+
+
+def bulk_update_status(pairs: List[Tuple[int, int]], timestamp: str) -> List[Tuple[int, Optional[int], int]]:
+    """
+    複数人分のステータスを 1 トランザクションで更新する（受信 API 用）。
+    - people に存在しない person_id は無視する（結果に含めない）
+      SQLite の INTEGER に収まらない person_id も、問い合わせに渡さず存在しないものとして扱う
+    - 同じ person_id が複数回現れた場合は先頭から順に適用したものとして扱う
+    - 旧値と異なる（または初回の）行のみ書き込み、コミットは 1 回
+    - 全件がキャッシュ上の最新ステータス（_STATUS_CACHE_TTL 秒以内に DB で確認したもの）と同じ（再送）なら DB には触れない
+    引数:
+      - pairs: [(person_id, status), ...]（受信順）
+      - timestamp: str (YYYY-MM-DD HH:MM:SS)
+    戻り値:
+      - [(person_id, old_status, new_status), ...]  登録済み ID のみ、受信順
+        old_status は初回挿入の場合 None
+    """
+    if not pairs:
+        return []
+
+    # 全件が既知の値と同じであれば、変更なしとしてそのまま返す
+    # （確認時刻は更新しないため、再送が続いても _STATUS_CACHE_TTL 秒ごとに DB で確認し直す）
+    now = time.monotonic()
+    with _status_cache_lock:
+        unchanged = True
+        for person_id, status in pairs:
+            cached = _status_cache.get(person_id)
+            if cached is None or cached[0] != status or now - cached[1] >= _STATUS_CACHE_TTL:
+                unchanged = False
+                break
+        if unchanged:
+            for person_id, _ in pairs:
+                _status_cache.move_to_end(person_id)
+    if unchanged:
+        return [(person_id, status, status) for person_id, status in pairs]
+
+    def _run(conn: sqlite3.Connection) -> List[Tuple[int, Optional[int], int]]:
+        cur = conn.cursor()
+        cur.execute("BEGIN IMMEDIATE")
+        # 範囲外の id を 1 つでも渡すと問い合わせ全体が OverflowError になるため、先に除く
+        ids = list({person_id for person_id, _ in pairs if fits_sqlite_int(person_id)})
+        existing = {r[0] for r in _fetch_in(cur, _SQL_PEOPLE_IDS_IN, ids)}
+        current: Dict[int, int] = {
+            r[0]: int(r[1])
+            for r in _fetch_in(cur, _SQL_STATUS_SELECT_IN, [i for i in ids if i in existing])
+        }
+
+        had_status = set(current)
+
+        results: List[Tuple[int, Optional[int], int]] = []
+        changed: Dict[int, int] = {}
+        for person_id, status in pairs:
+            if person_id not in existing:
+                continue
+            old_status = current.get(person_id)
+            results.append((person_id, old_status, status))
             if old_status != status:
-                cur.execute(
-                    "UPDATE status SET status = ?, timestamp = ? WHERE person_id = ?",
-                    (status, timestamp, person_id),
-                )
-                conn.commit()
-            # 旧値（更新の有無にかかわらず返す）
-            return old_status
-    finally:
-        conn.close()
+                current[person_id] = status
+                changed[person_id] = status
+
+        if not changed:
+            # 書き込み対象なし（コミット不要）
+            conn.rollback()
+            _cache_statuses(current)
+            return results
+
+        # 既存行は UPDATE、初回は INSERT に振り分ける（UPSERT の衝突処理を避ける）
+        updates = [(st, timestamp, pid) for pid, st in changed.items() if pid in had_status]
+        inserts = [(pid, st, timestamp) for pid, st in changed.items() if pid not in had_status]
+        if updates:
+            cur.executemany(_SQL_STATUS_UPDATE, updates)
+        if inserts:
+            cur.executemany(_SQL_STATUS_INSERT, inserts)
+        conn.commit()
+        _cache_statuses(current)
+        return results
+
+    return _with_write(_run)
 
 
 def get_status_table() -> List[Dict[str, Any]]:
@@ -142,70 +476,49 @@ def get_status_table() -> List[Dict[str, Any]]:
       - id, name, department, grade, role, room, status, timestamp
     並び順: department ASC, room ASC, name ASC
     """
-    conn = _get_conn()
-    try:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            SELECT p.id as id, p.name as name, p.department as department, p.grade as grade,
-                   p.role as role, p.room as room,
-                   s.status as status, s.timestamp as timestamp
-            FROM people p
-            LEFT JOIN status s ON p.id = s.person_id
-            ORDER BY COALESCE(p.department, ''), COALESCE(p.room, ''), COALESCE(p.name, '')
-            """
-        )
-        rows = cur.fetchall()
-        result: List[Dict[str, Any]] = []
-        for r in rows:
-            result.append(
-                {
-                    "id": r["id"],
-                    "name": r["name"],
-                    "department": r["department"],
-                    "grade": r["grade"],
-                    "role": r["role"],
-                    "room": r["room"],
-                    "status": (None if r["status"] is None else int(r["status"])),
-                    "timestamp": r["timestamp"],
-                }
-            )
-        return result
-    finally:
-        conn.close()
+    with _get_read_conn() as conn:
+        # fetchall() で中間リストを作らず、カーソルから直接 dict を組み立てる
+        rows = conn.execute(_SQL_STATUS_TABLE)
+        return [
+            {
+                "id": i,
+                "name": n,
+                "department": d,
+                "grade": g,
+                "role": ro,
+                "room": rm,
+                "status": (None if st is None else int(st)),
+                "timestamp": ts,
+            }
+            for (i, n, d, g, ro, rm, st, ts) in rows
+        ]
 
 
 def get_people_all() -> List[Dict[str, Any]]:
     """
     管理画面用の people 一覧を返す。
     並び順: department ASC、room ASC、name ASC
+    結果は _PEOPLE_TTL 秒間キャッシュする（people の変更時は即時破棄）。
     """
-    conn = _get_conn()
-    try:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            SELECT id, name, department, grade, role, room
-            FROM people
-            ORDER BY COALESCE(department, ''), COALESCE(room, ''), COALESCE(name, '')
-            """
-        )
-        rows = cur.fetchall()
-        result: List[Dict[str, Any]] = []
-        for r in rows:
-            result.append(
-                {
-                    "id": r["id"],
-                    "name": r["name"],
-                    "department": r["department"],
-                    "grade": r["grade"],
-                    "role": r["role"],
-                    "room": r["room"],
-                }
-            )
-        return result
-    finally:
-        conn.close()
+    with _people_cache_lock:
+        cached = _people_cache["data"]
+        if cached is not None and time.monotonic() - _people_cache["ts"] < _PEOPLE_TTL:
+            return list(cached)
+        gen = _people_cache["gen"]
+
+    with _get_read_conn() as conn:
+        rows = conn.execute(_SQL_PEOPLE_ALL)
+        result = [
+            {"id": i, "name": n, "department": d, "grade": g, "role": ro, "room": rm}
+            for (i, n, d, g, ro, rm) in rows
+        ]
+
+    with _people_cache_lock:
+        # 読み取り中に破棄されていなければ保存する
+        if _people_cache["gen"] == gen:
+            _people_cache["data"] = result
+            _people_cache["ts"] = time.monotonic()
+    return list(result)
 
 
 def insert_person(default_data: Dict[str, Any]) -> int:
@@ -220,18 +533,51 @@ def insert_person(default_data: Dict[str, Any]) -> int:
     role = default_data.get("role")
     room = default_data.get("room")
 
-    conn = _get_conn()
-    try:
-        cur = conn.cursor()
-        cur.execute(
-            "INSERT INTO people (name, department, grade, role, room) VALUES (?, ?, ?, ?, ?)",
-            (name, department, grade, role, room),
-        )
+    def _run(conn: sqlite3.Connection) -> int:
+        cur = conn.execute(_SQL_INSERT_PERSON, (name, department, grade, role, room))
         new_id = cur.lastrowid
         conn.commit()
         return new_id
-    finally:
-        conn.close()
+
+    new_id = _with_write(_run)
+    _invalidate_people_cache()
+    return new_id
+
+
+def insert_people_bulk(people: List[Dict[str, Any]], initial_status: int, timestamp: str) -> List[int]:
+    """
+    複数人を people に挿入し、それぞれの初期ステータスを 1 トランザクションで設定する（初期データ投入用）。
+    - people の各要素は insert_person の default_data と同じ形式
+    - 途中で失敗した場合は全件 rollback して例外を送出する
+    - 戻り値は新規に採番された person_id のリスト（people と同じ順）
+    """
+    if not people:
+        return []
+
+    rows = [
+        (p.get("name"), p.get("department"), p.get("grade"), p.get("role"), p.get("room"))
+        for p in people
+    ]
+
+    def _run(conn: sqlite3.Connection) -> List[int]:
+        try:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                # 採番された id が必要なため people は 1 行ずつ、status は executemany でまとめて挿入する
+                new_ids = [conn.execute(_SQL_INSERT_PERSON, row).lastrowid for row in rows]
+                conn.executemany(
+                    _SQL_STATUS_INSERT,
+                    [(new_id, initial_status, timestamp) for new_id in new_ids],
+                )
+        except Exception:
+            logging.exception("insert_people_bulk rollback due to exception")
+            raise
+        _cache_statuses({new_id: initial_status for new_id in new_ids})
+        return new_ids
+
+    new_ids = _with_write(_run)
+    _invalidate_people_cache()
+    return new_ids
 
 
 def delete_person(person_id: int) -> None:
@@ -239,19 +585,21 @@ def delete_person(person_id: int) -> None:
     people および関連する status を物理削除する。
     トランザクションで一括削除して rollback に対応。
     """
-    conn = _get_conn()
-    try:
-        cur = conn.cursor()
-        cur.execute("BEGIN")
-        cur.execute("DELETE FROM status WHERE person_id = ?", (person_id,))
-        cur.execute("DELETE FROM people WHERE id = ?", (person_id,))
-        conn.commit()
-    except Exception:
-        conn.rollback()
-        logging.exception("delete_person rollback due to exception for id=%s", person_id)
-        raise
-    finally:
-        conn.close()
+    def _run(conn: sqlite3.Connection) -> None:
+        try:
+            # with conn: 正常終了で commit、例外時は rollback
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.execute(_SQL_DELETE_STATUS, (person_id,))
+                conn.execute(_SQL_DELETE_PERSON, (person_id,))
+        except Exception:
+            logging.exception("delete_person rollback due to exception for id=%s", person_id)
+            raise
+        with _status_cache_lock:
+            _status_cache.pop(person_id, None)
+
+    _with_write(_run)
+    _invalidate_people_cache()
 
 
 def apply_bulk_updates(records: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -261,65 +609,86 @@ def apply_bulk_updates(records: List[Dict[str, Any]]) -> Dict[str, Any]:
       - id: (既存行の id, 新規の場合は None または absent)
       - name, department, grade, role, room: 各フィールド（編集後の値）
     動作:
-      - id がある場合は UPDATE を行う
+      - id がある場合は UPDATE を行う（存在しない id は no_target_for_update としてエラーに記録）
       - id が無い場合は INSERT を行う
+      - INSERT / UPDATE はそれぞれ executemany でまとめて実行する
+      - バインドできない値（64bit に収まらない整数など）を含むレコードは record_error としてスキップする
     戻り値:
-      - summary: {'updated': n, 'inserted': m, 'errors': [ ... ] }
+      - summary: {'updated': n, 'inserted': m, 'errors': [ ... ] }（errors は records の順）
     """
     inserted = 0
     updated = 0
-    errors: List[str] = []
+    # (レコードの位置, メッセージ)。最後に位置順に並べて records と同じ順で返す
+    indexed_errors: List[Tuple[int, str]] = []
 
-    conn = _get_conn()
-    try:
-        cur = conn.cursor()
-        cur.execute("BEGIN")
-        for rec in records:
-            try:
-                pid = rec.get("id")
-                name = rec.get("name")
-                department = rec.get("department")
-                grade = rec.get("grade")
-                role = rec.get("role")
-                room = rec.get("room")
-
-                if pid is None or pid == "" or (isinstance(pid, str) and pid.lower() == "null"):
-                    # 新規挿入
-                    cur.execute(
-                        "INSERT INTO people (name, department, grade, role, room) VALUES (?, ?, ?, ?, ?)",
-                        (name, department, grade, role, room),
-                    )
-                    inserted += 1
+    # 先に INSERT / UPDATE 用のパラメータへ振り分ける（レコード単位のエラーはここで収集）
+    inserts: List[Tuple[Any, ...]] = []
+    updates: List[Tuple[Any, ...]] = []
+    update_indexes: List[int] = []
+    for index, rec in enumerate(records):
+        try:
+            pid = rec.get("id")
+            values = (
+                rec.get("name"),
+                rec.get("department"),
+                rec.get("grade"),
+                rec.get("role"),
+                rec.get("room"),
+            )
+            # executemany 途中で失敗しないよう、バインドできない値はここで弾く
+            for v in values:
+                if v is not None and not isinstance(v, (str, int, float)):
+                    raise ValueError(f"unsupported field value: {v!r}")
+                if isinstance(v, int):
+                    _check_sqlite_int(v)
+
+            if pid is None or pid == "" or (isinstance(pid, str) and pid.lower() == "null"):
+                # 新規挿入
+                inserts.append(values)
+            else:
+                # 既存更新
+                try:
+                    pid_int = int(pid)
+                except Exception:
+                    raise ValueError(f"invalid id value: {pid}")
+                # 範囲外の id は存在確認の IN 検索ごと失敗させてしまうため、ここで弾く
+                _check_sqlite_int(pid_int)
+                updates.append(values + (pid_int,))
+                update_indexes.append(index)
+        except Exception as e_inner:
+            # レコード単位のエラーを収集して続行
+            logging.exception("apply_bulk_updates record error: %s", e_inner)
+            indexed_errors.append((index, f"record_error: {str(e_inner)}"))
+
+    def _run(conn: sqlite3.Connection) -> None:
+        nonlocal inserted, updated
+        try:
+            cur = conn.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            # UPDATE 対象の id が存在するかを 1 回の問い合わせでまとめて確認する
+            existing = {r[0] for r in _fetch_in(cur, _SQL_PEOPLE_IDS_IN, list({params[-1] for params in updates}))}
+            valid_updates: List[Tuple[Any, ...]] = []
+            for index, params in zip(update_indexes, updates):
+                if params[-1] in existing:
+                    valid_updates.append(params)
                 else:
-                    # 既存更新
-                    try:
-                        pid_int = int(pid)
-                    except Exception:
-                        raise ValueError(f"invalid id value: {pid}")
-
-                    cur.execute(
-                        """
-                        UPDATE people
-                        SET name = ?, department = ?, grade = ?, role = ?, room = ?
-                        WHERE id = ?
-                        """,
-                        (name, department, grade, role, room, pid_int),
-                    )
-                    if cur.rowcount > 0:
-                        updated += 1
-                    else:
-                        # 対象行が無かった（ID 不正等）
-                        errors.append(f"no_target_for_update id={pid_int}")
-            except Exception as e_inner:
-                # レコード単位のエラーを収集して続行
-                logging.exception("apply_bulk_updates record error: %s", e_inner)
-                errors.append(f"record_error: {str(e_inner)}")
-        conn.commit()
-    except Exception:
-        conn.rollback()
-        logging.exception("apply_bulk_updates rolled back due to exception")
-        raise
-    finally:
-        conn.close()
+                    # 対象行が無かった（ID 不正等）
+                    indexed_errors.append((index, f"no_target_for_update id={params[-1]}"))
+
+            if inserts:
+                cur.executemany(_SQL_INSERT_PERSON, inserts)
+            if valid_updates:
+                cur.executemany(_SQL_UPDATE_PERSON, valid_updates)
+            conn.commit()
+            inserted = len(inserts)
+            updated = len(valid_updates)
+        except Exception:
+            conn.rollback()
+            logging.exception("apply_bulk_updates rolled back due to exception")
+            raise
+
+    _with_write(_run)
+    _invalidate_people_cache()
 
+    errors = [message for _, message in sorted(indexed_errors, key=lambda e: e[0])]
     return {"updated": updated, "inserted": inserted, "errors": errors}
@@ -4,20 +4,21 @@
 #
 # 提供関数:
 # - parse_status_payload(raw_data: str) -> List[Tuple[str, str]]
-# - write_format_error_log(raw_data: str) -> None
-# - write_unregistered_id_log(person_id_raw: str, raw_data: str) -> None
+# - write_format_error_log(raw_data: str, timestamp: Optional[str] = None) -> None
+# - write_unregistered_id_log(person_id_raw: str, raw_data: str, timestamp: Optional[str] = None) -> None
+# - write_unregistered_id_logs(person_id_raws: List[str], raw_data: str, timestamp: Optional[str] = None) -> None
 # - write_status_change_log(person_id: int, old_status: int, new_status: int, timestamp: str) -> None
+# - write_status_change_logs(changes: List[Tuple[int, int, int]], timestamp: str) -> None
 # - handle_status_update_request(raw_data: str) -> Tuple[int, dict]
 #
 # 前提:
-# - utils_log に get_current_timestamp(), write_log_line() が実装されていること
-# - db に person_exists(person_id:int) と update_status(person_id:int, status:int, timestamp:str) が実装されていること
+# - utils_log に get_current_timestamp(), enqueue_log_line(), enqueue_log_lines() が実装されていること
+# - db に bulk_update_status(pairs:List[Tuple[int,int]], timestamp:str) が実装されていること
 
 from typing import List, Tuple, Optional
 import utils_log
 import db
 import logging
-import re
 
 
 
@@ -32,6 +33,24 @@ FORMAT_ERROR_LOG = "format_error.log"
 UNREGISTERED_ID_LOG = "unregistered_id.log"
 STATUS_CHANGE_LOG = "status_change.log"
 
+# 受信ステータス文字列 -> 数値（ここに無い値は不正）
+_STATUS_MAP = {"0": 0, "1": 1}
+
+# person_id の最大桁数（先頭の 0 を除く）。SQLite の INTEGER の範囲（符号付き 64bit）は最大 19 桁
+_MAX_ID_DIGITS = 19
+
+
+def _get_timestamp() -> str:
+    """
+    utils_log.get_current_timestamp() を呼ぶ。失敗時は "UNKNOWN_TIME" を返す。
+    """
+    try:
+        return utils_log.get_current_timestamp()
+    except Exception:
+        # utils_log が未実装/例外なら Python の logging に fallback
+        logging.exception("utils_log.get_current_timestamp() failed")
+        return "UNKNOWN_TIME"
+
 
 # -------------------------------------------------------------
 # 1) データ解析（設計 4.5.9.1.6）
@@ -46,7 +65,8 @@ def parse_status_payload(raw_data: str) -> List[Tuple[str, str]]:
     if raw_data is None:
         raise ValueError("raw_data is None")
 
-    parts = re.split(r"[,\s]+", raw_data.strip())
+    # カンマを空白に置き換えて str.split() で分割（連続する区切りや前後の空白は無視される）
+    parts = raw_data.replace(",", " ").split()
     if len(parts) == 0:
         # 空文字列はフォーマットエラー扱い
         raise ValueError("empty payload")
@@ -55,56 +75,54 @@ def parse_status_payload(raw_data: str) -> List[Tuple[str, str]]:
         # トークン数が奇数 -> フォーマットエラー
         raise ValueError("invalid payload format: odd number of tokens")
 
-    result: List[Tuple[str, str]] = []
-    for i in range(0, len(parts), 2):
-        pid_raw = parts[i]
-        status_raw = parts[i + 1]
-        result.append((pid_raw, status_raw))
-
-    return result
+    # 偶数番目が ID、奇数番目が STATUS（スライスと zip で組を作る）
+    return list(zip(parts[0::2], parts[1::2]))
 
 
 # -------------------------------------------------------------
 # 2) フォーマットエラーログ（設計 4.5.9.1.4）
 # -------------------------------------------------------------
-def write_format_error_log(raw_data: str) -> None:
+def write_format_error_log(raw_data: str, timestamp: Optional[str] = None) -> None:
     """
     フォーマットエラーをログに残す。
     ログ形式: "<timestamp> FORMAT_ERROR <raw_data>"
+    timestamp 省略時は現在時刻を使う。
     """
-    try:
-        ts = utils_log.get_current_timestamp()
-    except Exception:
-        # utils_log が未実装/例外なら Python の logging に fallback
-        logging.exception("utils_log.get_current_timestamp() failed")
-        ts = "UNKNOWN_TIME"
+    ts = timestamp if timestamp is not None else _get_timestamp()
 
     line = f"{ts} FORMAT_ERROR {raw_data}"
     try:
-        utils_log.write_log_line(FORMAT_ERROR_LOG, line)
+        utils_log.enqueue_log_line(FORMAT_ERROR_LOG, line)
     except Exception:
-        logging.exception("write_log_line failed for format error")
+        logging.exception("enqueue_log_line failed for format error")
 
 
 # -------------------------------------------------------------
 # 3) 未登録 ID ログ（設計 4.5.9.1.5）
 # -------------------------------------------------------------
-def write_unregistered_id_log(person_id_raw: str, raw_data: str) -> None:
+def write_unregistered_id_log(person_id_raw: str, raw_data: str, timestamp: Optional[str] = None) -> None:
     """
     未登録 ID を受信した場合にログを残す。
     ログ形式: "<timestamp> UNREGISTERED_ID <person_id_raw> payload=<raw_data>"
+    timestamp 省略時は現在時刻を使う。
     """
-    try:
-        ts = utils_log.get_current_timestamp()
-    except Exception:
-        logging.exception("utils_log.get_current_timestamp() failed")
-        ts = "UNKNOWN_TIME"
+    write_unregistered_id_logs([person_id_raw], raw_data, timestamp)
+
+
+def write_unregistered_id_logs(person_id_raws: List[str], raw_data: str, timestamp: Optional[str] = None) -> None:
+    """
+    1 リクエスト分の未登録 ID をまとめてログに残す（書き込みは 1 回）。
+    ログ形式は write_unregistered_id_log と同じ。
+    """
+    if not person_id_raws:
+        return
+    ts = timestamp if timestamp is not None else _get_timestamp()
 
-    line = f"{ts} UNREGISTERED_ID {person_id_raw} payload={raw_data}"
+    lines = [f"{ts} UNREGISTERED_ID {pid_raw} payload={raw_data}" for pid_raw in person_id_raws]
     try:
-        utils_log.write_log_line(UNREGISTERED_ID_LOG, line)
+        utils_log.enqueue_log_lines(UNREGISTERED_ID_LOG, lines)
     except Exception:
-        logging.exception("write_log_line failed for unregistered id")
+        logging.exception("enqueue_log_lines failed for unregistered id")
 
 
 # -------------------------------------------------------------
@@ -115,11 +133,24 @@ def write_status_change_log(person_id: int, old_status: int, new_status: int, ti
     状態が変化した場合にログを記録する。
     ログ形式: "<timestamp> STATUS_CHANGE id=<person_id> old=<old_status> new=<new_status>"
     """
-    line = f"{timestamp} STATUS_CHANGE id={person_id} old={old_status} new={new_status}"
+    write_status_change_logs([(person_id, old_status, new_status)], timestamp)
+
+
+def write_status_change_logs(changes: List[Tuple[int, int, int]], timestamp: str) -> None:
+    """
+    1 リクエスト分の状態変化 [(person_id, old_status, new_status), ...] をまとめて記録する。
+    ログ形式は write_status_change_log と同じ。
+    """
+    if not changes:
+        return
+    lines = [
+        f"{timestamp} STATUS_CHANGE id={person_id} old={old_status} new={new_status}"
+        for person_id, old_status, new_status in changes
+    ]
     try:
-        utils_log.write_log_line(STATUS_CHANGE_LOG, line)
+        utils_log.enqueue_log_lines(STATUS_CHANGE_LOG, lines)
     except Exception:
-        logging.exception("write_log_line failed for status change")
+        logging.exception("enqueue_log_lines failed for status change")
 
 
 # -------------------------------------------------------------
@@ -132,70 +163,85 @@ def handle_status_update_request(raw_data: str) -> Tuple[int, dict]:
 
     フロー（設計に準拠）:
       1) parse_status_payload で形式チェック。ValueError -> フォーマットエラーログ -> 400 を返す。
-      2) 各 (person_id_raw, status_raw) ペアを処理:
-         - person_id_raw を int に変換できなければ未登録ログを残してスキップ
-         - status_raw が "0" or "1" でない場合はフォーマットエラー（400）
-         - db.person_exists(person_id) が False の場合は未登録ログを残してスキップ
-         - db.update_status(person_id, status_int, timestamp) を呼び、old_status を取得
+      2) 各 (person_id_raw, status_raw) ペアを検証:
+         - person_id_raw が整数表記でなければ未登録ログを残してスキップ
+         - status_raw が "0" or "1" でない場合はフォーマットエラー（400、DB は更新しない）
+      3) db.bulk_update_status(pairs, timestamp) で全ペアを 1 トランザクションで反映し、
+         登録済み ID ごとの old_status を取得
+         - 結果に含まれない（people に存在しない）ID は未登録ログを残す
          - old_status が None（初回挿入）の場合は状態変更ログは出さない
          - old_status が存在し、old_status != new_status の場合は状態変更ログを出す
-      3) すべて正常に処理したら 200 + {"result":"ok"} を返す
+      4) すべて正常に処理したら 200 + {"result":"ok"} を返す
     """
+    # タイムスタンプはリクエスト単位で 1 回だけ取得し、DB 更新・各ログで共用する
+    ts = _get_timestamp()
+
     # 1) 解析
     try:
         parsed = parse_status_payload(raw_data)
     except ValueError as ve:
         # フォーマットエラー: ログ書き込みして 400 を返す
-        write_format_error_log(raw_data)
+        write_format_error_log(raw_data, ts)
         return 400, {"result": "error", "reason": "format_error", "detail": str(ve)}
 
-    # 2) 各ペアの処理
+    # 2) 各ペアの検証（DB へは全ペアをまとめて 1 回で反映する）
+    pairs: List[Tuple[int, int]] = []
+    # 未登録 ID はリクエスト終了時に受信順でまとめてログへ書く。
+    # そのため検証済みの ID を受信順に (pid_raw, person_id) で保持する（数値でない・範囲外の ID は person_id が None）
+    checked: List[Tuple[str, Optional[int]]] = []
     for pid_raw, status_raw in parsed:
-        # person_id の整数化
-        try:
-            person_id = int(pid_raw)
-        except Exception:
-            # 数値でない -> 未登録ログ（設計では未登録IDはログを残してスキップ）
-            write_unregistered_id_log(pid_raw, raw_data)
+        # person_id の整数化（先に文字種と桁数を確認し、例外を発生させずに不正値を弾く）
+        # 桁数は先頭の 0 を除いて数え、int() の桁数上限（4300 桁）に触れる長さは変換しない
+        digits = pid_raw[1:] if pid_raw[:1] in ("+", "-") else pid_raw
+        significant = digits.lstrip("0")
+        if not digits.isdecimal() or len(significant) > _MAX_ID_DIGITS:
+            # 数値でない・桁数が多すぎる -> 未登録ログ（設計では未登録IDはログを残してスキップ）
+            checked.append((pid_raw, None))
+            continue
+        person_id = int(significant or "0")
+        if pid_raw[:1] == "-":
+            person_id = -person_id
+        if not db.fits_sqlite_int(person_id):
+            # DB に格納できない範囲の ID は登録されていない
+            checked.append((pid_raw, None))
             continue
 
-        # status の検証（"0" または "1" のみ許可）
-        if status_raw not in ("0", "1"):
+        # status の検証と数値化（"0" または "1" のみ許可）
+        status_int = _STATUS_MAP.get(status_raw)
+        if status_int is None:
             # 設計に従いフォーマットエラーとして扱う
-            write_format_error_log(raw_data)
+            write_unregistered_id_logs([r for r, pid in checked if pid is None], raw_data, ts)
+            write_format_error_log(raw_data, ts)
             return 400, {"result": "error", "reason": "invalid_status", "detail": status_raw}
 
-        status_int = int(status_raw)
-
-        # DB に登録があるか確認
-        try:
-            exists = db.person_exists(person_id)
-        except Exception:
-            logging.exception("db.person_exists failed for id=%s", person_id)
-            # DB エラーは内部エラーとして扱う（500）
-            return 500, {"result": "error", "reason": "db_error", "detail": "person_exists failed"}
+        pairs.append((person_id, status_int))
+        checked.append((pid_raw, person_id))
 
-        if not exists:
-            write_unregistered_id_log(pid_raw, raw_data)
-            continue
-
-        # タイムスタンプ取得（ログに使用）
-        try:
-            ts = utils_log.get_current_timestamp()
-        except Exception:
-            logging.exception("utils_log.get_current_timestamp() failed")
-            ts = "UNKNOWN_TIME"
-
-        # DB 更新: old_status を返す（存在しなければ None）
-        try:
-            old_status = db.update_status(person_id, status_int, ts)
-        except Exception:
-            logging.exception("db.update_status failed for id=%s", person_id)
-            return 500, {"result": "error", "reason": "db_error", "detail": "update_status failed"}
-
-        # 旧値が存在し、かつ異なる場合のみ状態変更ログを書く（設計通り）
-        if old_status is not None and old_status != status_int:
-            write_status_change_log(person_id, old_status, status_int, ts)
-
-    # 3) 正常終了
+    # 3) DB 更新: 登録済み ID ごとに (person_id, old_status, new_status) を受信順に返す
+    try:
+        results = db.bulk_update_status(pairs, ts)
+    except Exception:
+        logging.exception("db.bulk_update_status failed")
+        write_unregistered_id_logs([r for r, pid in checked if pid is None], raw_data, ts)
+        return 500, {"result": "error", "reason": "db_error", "detail": "update_status failed"}
+
+    # 数値でない ID と結果に含まれない ID が未登録（受信順のまま書く）
+    registered = {person_id for person_id, _, _ in results}
+    write_unregistered_id_logs(
+        [r for r, pid in checked if pid is None or pid not in registered],
+        raw_data,
+        ts,
+    )
+
+    # 旧値が存在し、かつ異なる場合のみ状態変更ログを書く（設計通り）
+    write_status_change_logs(
+        [
+            (person_id, old_status, new_status)
+            for person_id, old_status, new_status in results
+            if old_status is not None and old_status != new_status
+        ],
+        ts,
+    )
+
+    # 4) 正常終了
     return 200, {"result": "ok"}
@@ -1,5 +1,6 @@
 # main.py
-# エントリポイント (Dockerfile の CMD ["python", "main.py"] に一致)
+# エントリポイント (Dockerfile の CMD では gunicorn から main:app として読み込む。
+# 開発時は python main.py で Flask 開発サーバを起動できる)
 # Flask を templates/ を static としても使う最小変更方針で初期化し、
 # 設計仕様書（4.5節）に準拠したルーティングを提供する。
 #
@@ -14,37 +15,19 @@
 #  - 実際のビジネスロジック（パース・DB 更新・ログ出力）は handlers_status.py 等に委譲する。
 #  - このファイルは「ルーティングと入力検証」を担う薄いハンドラです。
 
-from flask import Flask, request, jsonify, make_response, render_template
-from typing import Any
-import json
+from flask import Flask, request, render_template
+from typing import Any, Dict
+import orjson
 import urllib.parse
 import logging
-import api_admin_logic
+import os
 
 # 別ファイルに実装するモジュールを import（同一ディレクトリ app/ に存在する前提）
-try:
-    import handlers_status
-except Exception as e:
-    logging.warning("handlers_status import failed: %s", e)
-    handlers_status = None
-
-try:
-    import api_admin_logic
-except Exception as e:
-    logging.warning("api_admin_logic import failed: %s", e)
-    api_admin_logic = None
-
-try:
-    import db
-except Exception as e:
-    logging.warning("db import failed: %s", e)
-    db = None
-
-try:
-    import utils_log
-except Exception as e:
-    logging.warning("utils_log import failed: %s", e)
-    utils_log = None
+# いずれかが読み込めない場合は起動時にエラーとし、各ハンドラでは存在を確認しない
+import handlers_status
+import api_admin_logic
+import db
+import utils_log
 
 
 # Flask の初期化:
@@ -57,25 +40,63 @@ app = Flask(
     template_folder="templates"  # render_template() に templates/ を使う
 )
 
-if db is not None and hasattr(db, "init_db"):
+# テンプレートは実行中に変更しない前提のため、更新チェック（mtime 確認）を無効化し、
+# 起動時に HTML テンプレートをコンパイルしておく。
+# templates/ には css/js も置かれているため、対象は .html のみとする。
+app.config["TEMPLATES_AUTO_RELOAD"] = False
+app.jinja_env.auto_reload = False
+for _template_name in app.jinja_env.list_templates(filter_func=lambda name: name.endswith(".html")):
     try:
-        db.init_db()
+        app.jinja_env.get_template(_template_name)
     except Exception as e:
-        logging.error("DB 初期化に失敗しました: %s", e)
+        logging.warning("テンプレートの事前コンパイルに失敗しました: %s (%s)", _template_name, e)
+
+# 管理画面・閲覧画面の HTML はリクエストごとに変わる値を含まないため、
+# 起動時に一度だけ描画してバイト列を保持しておく（debug 時は毎回描画する）。
+_PRERENDERED_PAGES: Dict[str, bytes] = {}
+with app.app_context():
+    for _page_name in ("admin.html", "view.html"):
+        try:
+            _PRERENDERED_PAGES[_page_name] = render_template(_page_name).encode("utf-8")
+        except Exception as e:
+            logging.warning("ページの事前描画に失敗しました: %s (%s)", _page_name, e)
+
+# DB に書き込むプロセスは 1 つに限る（ステータスのキャッシュが他プロセスの書き込みを想定していないため）。
+# 既に別のプロセスが同じ DB を使っている場合は例外のまま起動を止める。
+# python main.py で起動した場合は、リローダーの扱いを決められる app.run の直前で取得する。
+if __name__ != "__main__":
+    db.acquire_writer_lock()
+
+try:
+    db.init_db()
+    # 一覧 API 用の読み取り接続を起動時に作成しておく
+    db.warm_read_pool()
+except Exception as e:
+    logging.error("DB 初期化に失敗しました: %s", e)
 
 # 起動時にログディレクトリを確保（存在チェック）。utils_log に委譲。
-if utils_log is not None and hasattr(utils_log, "ensure_log_dir_exists"):
-    try:
-        utils_log.ensure_log_dir_exists()
-    except Exception as e:
-        logging.warning("ログディレクトリの初期化に失敗しました: %s", e)
+try:
+    utils_log.ensure_log_dir_exists()
+except Exception as e:
+    logging.warning("ログディレクトリの初期化に失敗しました: %s", e)
 
 
 # ユーティリティ: JSON レスポンス作成
+# orjson で直接 UTF-8 の bytes に変換し、そのままレスポンス本体にする
 def json_response(body: Any, status: int = 200):
-    resp = make_response(jsonify(body), status)
-    resp.headers["Content-Type"] = "application/json; charset=utf-8"
-    return resp
+    return app.response_class(
+        orjson.dumps(body),
+        status=status,
+        content_type="application/json; charset=utf-8",
+    )
+
+
+# ユーティリティ: HTML ページ応答（事前描画済みならそれを返し、無ければ描画する）
+def page_response(template_name: str):
+    body = None if app.debug else _PRERENDERED_PAGES.get(template_name)
+    if body is None:
+        return render_template(template_name)
+    return app.response_class(body, mimetype="text/html")
 
 
 # -----------------------
@@ -92,9 +113,6 @@ def api_status_update():
     if raw_data is None:
         return json_response({"result": "error", "reason": "missing_data"}, 400)
 
-    if handlers_status is None or not hasattr(handlers_status, "handle_status_update_request"):
-        return json_response({"result": "error", "reason": "server_not_ready", "detail": "handlers_status missing"}, 500)
-
     try:
         # handlers_status は (http_status:int, response_dict:dict) を返す想定
         http_status, resp = handlers_status.handle_status_update_request(raw_data)
@@ -124,7 +142,7 @@ def api_admin():
                     400
                 )
 
-            records = json.loads(records_json)
+            records = orjson.loads(records_json)
             detail = api_admin_logic.apply_bulk_updates(records)
             return json_response(
                 {"result": "ok", "detail": detail},
@@ -146,14 +164,15 @@ def api_admin():
             )
 
         elif action == "delete":
-            person_id = request.args.get("person_id")
-            if not person_id:
+            # 未指定・整数でない場合はいずれも None になる
+            person_id = request.args.get("person_id", type=int)
+            if person_id is None:
                 return json_response(
                     {"result": "error", "reason": "missing_person_id"},
                     400
                 )
 
-            api_admin_logic.delete_person(int(person_id))
+            api_admin_logic.delete_person(person_id)
             return json_response({"result": "ok"}, 200)
 
         else:
@@ -190,9 +209,6 @@ def api_status_view():
     閲覧用一覧を返す。db.get_status_table() に委譲。
     返却形式: { result: "ok", records: [...] }
     """
-    if db is None or not hasattr(db, "get_status_table"):
-        return json_response({"result": "error", "reason": "server_not_ready", "detail": "db missing"}, 500)
-
     try:
         records = db.get_status_table()
         return json_response({"result": "ok", "records": records}, 200)
@@ -207,11 +223,11 @@ def api_status_view():
 @app.route("/admin/", methods=["GET"])
 def serve_admin_page():
     """
-    templates/admin.html をレンダリングして返す。
+    templates/admin.html を返す（起動時に描画済みの内容を使う）。
     CSS/JS は /static/... の URL で参照する想定（templates 配下の css/js を /static/* で提供）。
     """
     try:
-        return render_template("admin.html")
+        return page_response("admin.html")
     except Exception as e:
         logging.exception("管理画面のレンダリングに失敗しました")
         return json_response({"result": "error", "reason": "file_not_found", "detail": str(e)}, 500)
@@ -220,10 +236,10 @@ def serve_admin_page():
 @app.route("/view/", methods=["GET"])
 def serve_view_page():
     """
-    templates/view.html をレンダリングして返す。
+    templates/view.html を返す（起動時に描画済みの内容を使う）。
     """
     try:
-        return render_template("view.html")
+        return page_response("view.html")
     except Exception as e:
         logging.exception("閲覧画面のレンダリングに失敗しました")
         return json_response({"result": "error", "reason": "file_not_found", "detail": str(e)}, 500)
@@ -233,6 +249,12 @@ def serve_view_page():
 # アプリ起動
 # -----------------------
 if __name__ == "__main__":
-    # コンテナ実行向けの設定: host=0.0.0.0, port=5000, debug=False
+    # 開発用: Flask 開発サーバで起動する（コンテナでは gunicorn が main:app を起動する）
+    # host=0.0.0.0, port=5000, debug=False
     # 開発時は debug=True にして動作確認してください。
-    app.run(host="0.0.0.0", port=5000, debug=False)
+    debug = False
+    # debug=True ではリローダーの親プロセスもこのファイルを実行するが、親は監視のみで
+    # リクエストを処理しないため、実際にサーバを動かす子プロセス（WERKZEUG_RUN_MAIN=true）だけがロックを取る
+    if not debug or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        db.acquire_writer_lock()
+    app.run(host="0.0.0.0", port=5000, debug=debug)
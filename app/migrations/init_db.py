@@ -4,21 +4,19 @@
 # 本スクリプトは Flask アプリからは直接呼び出されず、
 # 開発時・初期セットアップ時に手動実行することを想定している。
 #
-# 実行例:
-#   python migrations/init_db.py
+# 実行例（app ディレクトリ、コンテナでは /app で実行する）:
+#   python -m migrations.init_db
 #
 # 注意:
 # - DB 操作はすべて db.py に委譲し、SQL を直接書かない
 # - 既存データがある場合は多重投入を防ぐ
 
-import sys
 from typing import List, Dict
 
-# app ディレクトリを import パスに追加（直接実行対策）
-sys.path.append("..")
-
-from app import db
-from app import utils_log
+# -m で実行するとカレントディレクトリ（app/）が import パスに入るため、
+# main.py と同じく同一ディレクトリのモジュールとして import する
+import db
+import utils_log
 
 
 def _initial_people_data() -> List[Dict[str, str]]:
@@ -68,28 +66,19 @@ def main() -> None:
     db.init_db()
     print("DB 初期化完了")
 
-    # 初期人物データ投入
+    # 初期人物データ投入と初期ステータス（全員 0 = 不在 とする）の設定
+    # 1 トランザクションでまとめて行い、失敗した場合は何も投入しない
     people = _initial_people_data()
-    inserted_ids = []
 
-    print("初期人物データを投入します...")
-    for person in people:
-        try:
-            person_id = db.insert_person(person)
-            inserted_ids.append(person_id)
+    print("初期人物データと初期ステータスを投入します...")
+    try:
+        # timestamp は utils_log を使用
+        ts = utils_log.get_current_timestamp()
+        inserted_ids = db.insert_people_bulk(people, 0, ts)
+        for person_id, person in zip(inserted_ids, people):
             print(f"  追加: id={person_id}, name={person.get('name')}")
-        except Exception as e:
-            print(f"[ERROR] 人物データ投入失敗: {person} ({e})")
-
-    # 初期ステータス（全員 0 = 不在 とする）
-    print("初期ステータスを設定します...")
-    for pid in inserted_ids:
-        try:
-            # timestamp は utils_log を使用
-            ts = utils_log.get_current_timestamp()
-            db.update_status(pid, 0, ts)
-        except Exception as e:
-            print(f"[WARN] ステータス初期化失敗: id={pid} ({e})")
+    except Exception as e:
+        print(f"[ERROR] 初期データ投入失敗（全件取り消し）: {e}")
 
     print("=== DB 初期化処理 完了 ===")
 
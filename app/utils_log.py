@@ -4,14 +4,19 @@
 # 設計仕様書 4.5 節に基づき、以下の機能のみを提供する：
 #  - ログ保存ディレクトリの初期化
 #  - ログ用タイムスタンプ生成
-#  - ログファイルへの1行追記
+#  - ログファイルへの1行追記（複数行の一括追記）
+#  - ログ行の非同期追記（キューに積み、バックグラウンドスレッドがまとめて書き込む）
 #
 # 本モジュールは「最低限の責務」に留め、
 # ログ内容の生成やエラー制御は呼び出し側に委ねる。
 
+import atexit
+import logging
 import os
-from datetime import datetime
-from typing import Optional
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional, TextIO
 
 
 # デフォルトのログディレクトリ
@@ -21,12 +26,43 @@ DEFAULT_LOG_DIR = os.path.join(
     "logs"
 )
 
+# 非同期書き込みの設定
+# - キューに積める行数の上限（溢れた場合は同期書き込みにフォールバック）
+# - 最初の行を受け取ってから書き出すまでの最大待ち時間（秒）
+# - この行数がたまったら待ち時間を待たずに書き出す
+_LOG_QUEUE_MAXSIZE = 10000
+_LOG_FLUSH_INTERVAL = 0.05
+_LOG_FLUSH_LINES = 256
+
+# 要素は (filename, line)（line は改行で連結した複数行のこともある）。_LOG_STOP を受け取ると書き込みスレッドは残りを書き出して終了する
+_log_queue: "queue.Queue[Any]" = queue.Queue(maxsize=_LOG_QUEUE_MAXSIZE)
+_LOG_STOP = object()
+_log_thread: Optional[threading.Thread] = None
+
+# get_current_timestamp の直近の結果 (秒, 整形済み文字列)。同じ秒の間は文字列を使い回す
+# 秒と文字列を 1 つのタプルとして差し替えるため、複数スレッドから更新してもロックは不要
+_last_timestamp = (-1, "")
+
+# ensure_log_dir_exists の確認が済んだか（プロセス内で 1 回だけ確認する）
+_log_dir_ready = False
+
+# 開いたままにするログファイル（ファイル名ごとに 1 つ。プロセス終了時に close する）
+# 書き込みはこのロックを保持して行う
+_log_files: Dict[str, TextIO] = {}
+_log_files_lock = threading.Lock()
+
+
 def ensure_log_dir_exists() -> None:
     """
     ログ保存用ディレクトリを作成・確認する。
     - 既に存在する場合は何もしない
     - 作成できない、または書き込み不可の場合は例外を送出する
+    - 一度確認に成功した後はプロセス内では再確認しない
     """
+    global _log_dir_ready
+    if _log_dir_ready:
+        return
+
     log_dir = DEFAULT_LOG_DIR
 
     # ディレクトリ作成（存在していてもエラーにしない）
@@ -41,13 +77,81 @@ def ensure_log_dir_exists() -> None:
     except Exception as e:
         raise PermissionError(f"ログディレクトリに書き込めません: {log_dir}") from e
 
+    _log_dir_ready = True
+
 
 def get_current_timestamp() -> str:
     """
     現在時刻をログ用の文字列として返す。
     フォーマット: YYYY-MM-DD HH:MM:SS
+    秒単位の文字列なので、同じ秒の間は前回整形した結果を返す。
+    """
+    global _last_timestamp
+    sec = int(time.time())
+    cached = _last_timestamp
+    if cached[0] == sec:
+        return cached[1]
+    text = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(sec))
+    _last_timestamp = (sec, text)
+    return text
+
+
+def _get_log_dir() -> str:
+    """
+    ログファイルを置くディレクトリを返す。
+    """
+    return DEFAULT_LOG_DIR
+
+
+def _check_filename(filename: str) -> None:
+    """
+    ログファイル名にパス区切り文字が含まれていないことを確認する。
     """
-    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    if "/" in filename or "\\" in filename:
+        raise ValueError("filename にパス区切り文字を含めることはできません")
+
+
+def _get_log_file(filename: str) -> TextIO:
+    """
+    filename のログファイルを返す（_log_files_lock を保持して呼ぶ）。
+    初回だけファイル名の確認・パスの組み立て・open を行い、以降は開いたものを返す。
+    """
+    f = _log_files.get(filename)
+    if f is None:
+        _check_filename(filename)
+        # ファイルを初めて開くときだけログディレクトリを確認する（確認済みなら即 return）
+        ensure_log_dir_exists()
+        log_path = os.path.join(_get_log_dir(), filename)
+        f = open(log_path, "a", encoding="utf-8", buffering=8192)
+        _log_files[filename] = f
+    return f
+
+
+def write_log_lines(filename: str, lines: List[str]) -> None:
+    """
+    指定されたログファイルに複数行をまとめて追記する（flush は 1 回）。
+    ファイルは初回に開いたものを使い回す。
+    書き込み失敗時は例外を送出する（write_log_line と同じ）。
+    """
+    text = "".join(line + "\n" for line in lines)
+    with _log_files_lock:
+        f = _get_log_file(filename)
+        # OS へは渡すが fsync はしない（ログは DB と違い、毎行のディスク同期までは不要）
+        f.write(text)
+        f.flush()
+
+
+def _close_log_files() -> None:
+    """
+    開いているログファイルをすべて close する（プロセス終了時）。
+    """
+    with _log_files_lock:
+        for f in _log_files.values():
+            try:
+                f.close()
+            except Exception:
+                logging.exception("log file close failed")
+        _log_files.clear()
 
 
 def write_log_line(filename: str, line: str) -> None:
@@ -62,16 +166,105 @@ def write_log_line(filename: str, line: str) -> None:
       - 書き込み失敗時は例外を送出する
       - 呼び出し側で try/except することを前提とする
     """
-    if "/" in filename or "\\" in filename:
-        raise ValueError("filename にパス区切り文字を含めることはできません")
+    write_log_lines(filename, [line])
 
-    # ★ 追加：必ずログディレクトリを初期化
-    ensure_log_dir_exists()
 
-    log_dir = _get_log_dir()
-    log_path = os.path.join(log_dir, filename)
+def enqueue_log_line(filename: str, line: str) -> None:
+    """
+    ログ 1 行を書き込みキューに積む（ファイルへの書き込みはバックグラウンドで行う）。
 
-    with open(log_path, "a", encoding="utf-8") as f:
-        f.write(line + "\n")
-        f.flush()
-        os.fsync(f.fileno())
+    注意:
+      - filename が不正な場合はその場で例外を送出する
+      - キューが満杯の場合は write_log_line で同期的に書き込む
+    """
+    _check_filename(filename)
+    try:
+        _log_queue.put_nowait((filename, line))
+    except queue.Full:
+        write_log_line(filename, line)
+
+
+def enqueue_log_lines(filename: str, lines: List[str]) -> None:
+    """
+    複数行をまとめて 1 件として書き込みキューに積む。
+    キューが満杯の場合は write_log_lines で同期的に書き込む。
+    """
+    if not lines:
+        return
+    _check_filename(filename)
+    try:
+        # 改行で連結した 1 件として積む（書き込み時に末尾の改行が付与される）
+        _log_queue.put_nowait((filename, "\n".join(lines)))
+    except queue.Full:
+        write_log_lines(filename, lines)
+
+
+def _flush_pending(pending: Dict[str, List[str]]) -> None:
+    """
+    ファイル名ごとにまとめた行を書き出す。
+    """
+    for filename, lines in pending.items():
+        try:
+            write_log_lines(filename, lines)
+        except Exception:
+            logging.exception("log write failed: %s (%d lines)", filename, len(lines))
+
+
+def _log_writer_loop() -> None:
+    """
+    キューから行を取り出し、_LOG_FLUSH_INTERVAL 秒ごと
+    または _LOG_FLUSH_LINES 行ごとにファイル単位でまとめて書き出す。
+    """
+    pending: Dict[str, List[str]] = {}
+    count = 0
+    deadline = 0.0
+    stop = False
+    while not stop:
+        timeout = None if count == 0 else max(0.0, deadline - time.monotonic())
+        try:
+            item = _log_queue.get(timeout=timeout)
+        except queue.Empty:
+            item = None
+
+        if item is _LOG_STOP:
+            stop = True
+        elif item is not None:
+            filename, line = item
+            if count == 0:
+                deadline = time.monotonic() + _LOG_FLUSH_INTERVAL
+            pending.setdefault(filename, []).append(line)
+            count += 1
+
+        if count and (stop or count >= _LOG_FLUSH_LINES or time.monotonic() >= deadline):
+            _flush_pending(pending)
+            pending = {}
+            count = 0
+
+
+def _start_log_writer() -> None:
+    """
+    バックグラウンドの書き込みスレッドを起動する。
+    """
+    global _log_thread
+    _log_thread = threading.Thread(target=_log_writer_loop, name="log-writer", daemon=True)
+    _log_thread.start()
+
+
+def _stop_log_writer() -> None:
+    """
+    プロセス終了時に、キューに残っている行を書き出してからスレッドを止める。
+    """
+    if _log_thread is None or not _log_thread.is_alive():
+        return
+    try:
+        _log_queue.put(_LOG_STOP, timeout=1.0)
+    except queue.Full:
+        return
+    _log_thread.join(timeout=5.0)
+
+
+# モジュールロード時に書き込みスレッドを起動し、終了時に残りを書き出す
+# （atexit は登録と逆順に呼ばれるため、スレッド停止 → ファイル close の順になる）
+_start_log_writer()
+atexit.register(_close_log_files)
+atexit.register(_stop_log_writer)
@@ -8,7 +8,7 @@ echo "[entrypoint] checking database..."
 # DB が存在しない or 0 byte の場合のみ初期化
 if [ ! -s "$DB_FILE" ]; then
   echo "[entrypoint] initializing database..."
-  python migrations/init_db.py
+  python -m migrations.init_db
 else
   echo "[entrypoint] database already exists"
 fi